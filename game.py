@@ -6,16 +6,74 @@
 
 from __future__ import annotations
 
+import gzip
+import http.client
+import io
 import json
-from collections.abc import Iterable
+import pickle
+import re
+import urllib.error
+import urllib.request
+import zlib
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
-
-import requests
+from pathlib import Path
+from typing import Any
 
 from models import ErrorInfo, GameResult, MatchResult, OkvedItem, OkvedLoadError
 
+_json_loads: Callable[[bytes | bytearray], Any]
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # orjson - необязательная зависимость
+    _json_loads = json.loads
+
+_MAX_JSON_SIZE = 10 * 1024 * 1024
+_CHUNK_SIZE = 64 * 1024
+_DEFAULT_CACHE_DIR = Path.home() / ".cache" / "okved"
+# Версия формата кэша: меняется вместе с его структурой и раскладкой моделей.
+_CACHE_FORMAT = 3
+
+# Варианты записи номера после очистки: +7/7/8 и 10 цифр либо 10 цифр с 9.
+_RAW_PHONE_RE = re.compile(r"(?:\+?7|8)(\d{10})|(9\d{9})")
+_FINAL_PHONE_RE = re.compile(r"\+79\d{9}")
+
+
+class _DigitTable(dict[int, str | None]):
+    """Таблица для str.translate, оставляющая только цифры.
+
+    Заполняется лениво: символ проверяется через str.isdigit один раз,
+    после чего результат берётся из словаря.
+    """
+
+    def __missing__(self, codepoint: int) -> str | None:
+        char = chr(codepoint)
+        value = char if char.isdigit() else None
+        self[codepoint] = value
+        return value
+
+
+_DIGIT_TABLE = _DigitTable()
+_NON_DIGIT_BYTES = bytes(b for b in range(256) if not 0x30 <= b <= 0x39)
+
+
+class _CacheUnpickler(pickle.Unpickler):
+    """Распаковывает кэш ОКВЭД, разрешая из глобальных имён только OkvedItem."""
+
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) == (OkvedItem.__module__, OkvedItem.__qualname__):
+            return OkvedItem
+        raise pickle.UnpicklingError(f"Недопустимый объект в кэше: {module}.{name}")
+
 
-@dataclass(frozen=True)
+def _digits_only(text: str) -> str:
+    """Оставляет в строке только цифры."""
+    return text.translate(_DIGIT_TABLE)
+
+
+@dataclass(frozen=True, slots=True)
 class NormalizationResult:
     """Результат нормализации номера телефона."""
 
@@ -28,15 +86,12 @@ class PhoneNormalizer:
 
     def normalize(self, raw: str) -> NormalizationResult:
         """Нормализует строку с номером или возвращает ошибку."""
-        cleaned = self._clean(raw)
-        if cleaned.startswith("+"):
-            plus = "+"
-            digits = cleaned[1:]
-        else:
-            plus = ""
-            digits = cleaned
+        fast = self._normalize_fast(raw)
+        if fast is not None:
+            return NormalizationResult(phone=fast, error=None)
 
-        if not digits:
+        cleaned = self._clean(raw)
+        if not cleaned.removeprefix("+"):
             return NormalizationResult(
                 phone=None,
                 error=ErrorInfo(
@@ -45,7 +100,7 @@ class PhoneNormalizer:
                 ),
             )
 
-        normalized = self._normalize_digits(plus, digits)
+        normalized = self._normalize_digits(cleaned)
         if normalized is None:
             return NormalizationResult(
                 phone=None,
@@ -66,43 +121,44 @@ class PhoneNormalizer:
 
         return NormalizationResult(phone=normalized, error=None)
 
+    def _normalize_fast(self, raw: str) -> str | None:
+        """Распознаёт номера, уже записанные без пробелов и разделителей."""
+        normalized = self._normalize_digits(raw)
+        if normalized is not None and self._is_valid_final(normalized):
+            return normalized
+        return None
+
     def _clean(self, raw: str) -> str:
         """Извлекает цифры и плюс из строки."""
         raw = raw.strip()
         has_plus = raw.startswith("+")
-        digits_only = "".join(ch for ch in raw if ch.isdigit())
-        return ("+" if has_plus else "") + digits_only
-
-    def _normalize_digits(self, plus: str, digits: str) -> str | None:
-        """Приводит цифры к формату +7XXXXXXXXXXX."""
-        length = len(digits)
-
-        if plus == "+" and digits.startswith("7") and length == 11:
-            return "+" + digits
-        if plus == "" and digits.startswith("8") and length == 11:
-            return "+7" + digits[1:]
-        if plus == "" and digits.startswith("7") and length == 11:
-            return "+" + digits
-        if plus == "" and digits.startswith("9") and length == 10:
-            return "+7" + digits
+        if raw.isascii():
+            # Для ASCII цифры - это только 0-9, их быстрее отобрать в байтах.
+            digits = raw.encode("ascii").translate(None, _NON_DIGIT_BYTES).decode("ascii")
+        else:
+            digits = _digits_only(raw)
+        return ("+" if has_plus else "") + digits
 
-        return None
+    def _normalize_digits(self, cleaned: str) -> str | None:
+        """Приводит очищенную строку к формату +7XXXXXXXXXX."""
+        match = _RAW_PHONE_RE.fullmatch(cleaned)
+        if match is None:
+            return None
+        return "+7" + (match.group(1) or match.group(2))
 
     def _is_valid_final(self, phone: str) -> bool:
         """Проверяет формат +79XXXXXXXXX."""
-        return (
-            phone.startswith("+79")
-            and len(phone) == 12
-            and phone[1:].isdigit()
-        )
+        return _FINAL_PHONE_RE.fullmatch(phone) is not None
 
 
 class OkvedRepository:
     """Загружает и кэширует записи ОКВЭД из JSON по URL."""
 
-    def __init__(self, url: str) -> None:
+    def __init__(self, url: str, cache_dir: Path | None = None) -> None:
         self._url = url
+        self._cache_dir = cache_dir if cache_dir is not None else _DEFAULT_CACHE_DIR
         self._cache: list[OkvedItem] | None = None
+        self._matcher: OkvedMatcher | None = None
 
     def get_all(self) -> list[OkvedItem]:
         """Возвращает все записи ОКВЭД."""
@@ -110,37 +166,141 @@ class OkvedRepository:
             self._cache = self._load()
         return self._cache
 
+    def get_matcher(self) -> OkvedMatcher:
+        """Возвращает сопоставитель, построенный по всем записям ОКВЭД."""
+        if self._matcher is None:
+            self._matcher = OkvedMatcher(self.get_all())
+        return self._matcher
+
     def _load(self) -> list[OkvedItem]:
-        """Загружает записи ОКВЭД из JSON."""
-        data_text = self._fetch_json_text()
-        data = self._parse_json(data_text)
+        """Загружает записи ОКВЭД из JSON.
+
+        Разобранные записи сохраняются на диск вместе с ETag файла. Если
+        сохранённая копия есть, запрос отправляется с If-None-Match, и при
+        ответе 304 записи берутся с диска без повторного разбора JSON.
+        """
+        cached = self._read_disk_cache()
+        cached_etag = cached[0] if cached is not None else None
+
+        data_bytes, etag = self._fetch_json_bytes(cached_etag)
+        if data_bytes is None:
+            # Ответ 304 возможен, только если ETag из кэша был отправлен.
+            assert cached is not None
+            return cached[1]
+
+        data = self._parse_json(data_bytes)
         items = self._extract_okved_items(data)
+        if etag:
+            self._write_disk_cache(etag, items)
         return items
 
-    def _fetch_json_text(self) -> str:
-        """Загружает JSON-файл по HTTP и возвращает текст."""
+    def _fetch_json_bytes(
+        self,
+        etag: str | None,
+    ) -> tuple[bytes | bytearray | None, str | None]:
+        """Загружает JSON-файл по HTTP.
+
+        Возвращает содержимое файла и его ETag; при ответе 304 вместо
+        содержимого возвращается None.
+        """
+        # okved.json хорошо сжимается, поэтому просим отдать его в gzip.
+        headers = {"Accept-Encoding": "gzip"}
+        if etag:
+            headers["If-None-Match"] = etag
+
         try:
-            response = requests.get(
-                self._url,
-                timeout=5,
-                verify=True,
-                stream=True,
-            )
-            response.raise_for_status()
+            request = urllib.request.Request(self._url, headers=headers)
+            with urllib.request.urlopen(request, timeout=5) as response:
+                content_length = response.headers.get("Content-Length")
+                if content_length and int(content_length) > _MAX_JSON_SIZE:
+                    raise OkvedLoadError("Файл okved.json слишком большой (>10 МБ)")
+
+                stream: io.BufferedIOBase = response
+                if response.headers.get("Content-Encoding") == "gzip":
+                    stream = gzip.GzipFile(fileobj=response)
+                return self._read_limited(stream), response.headers.get("ETag")
+        except urllib.error.HTTPError as exc:
+            # urllib сообщает об ответе 304 исключением, как и об ошибках.
+            if etag and exc.code == 304:
+                return None, etag
+            raise OkvedLoadError(f"Не удалось загрузить okved.json: {exc}") from exc
+        except (
+            OSError,
+            EOFError,
+            ValueError,
+            zlib.error,
+            http.client.HTTPException,
+        ) as exc:
+            raise OkvedLoadError(f"Не удалось загрузить okved.json: {exc}") from exc
 
-            content_length = response.headers.get("Content-Length")
-            if content_length and int(content_length) > 10 * 1024 * 1024:
+    @staticmethod
+    def _read_limited(stream: io.BufferedIOBase) -> bytearray:
+        """Читает поток частями, не допуская превышения лимита размера.
+
+        Content-Length относится к сжатому телу, поэтому размер
+        распакованных данных проверяется по мере чтения. Буфер возвращается
+        без копирования в bytes: парсеры JSON принимают bytearray.
+        """
+        body = bytearray()
+        while chunk := stream.read(_CHUNK_SIZE):
+            body.extend(chunk)
+            if len(body) > _MAX_JSON_SIZE:
                 raise OkvedLoadError("Файл okved.json слишком большой (>10 МБ)")
+        return body
 
-            return response.text
-        except requests.RequestException as exc:
-            raise OkvedLoadError(f"Не удалось загрузить okved.json: {exc}") from exc
+    def _read_disk_cache(self) -> tuple[str, list[OkvedItem]] | None:
+        """Читает сохранённые ETag и записи ОКВЭД, если они есть.
+
+        ETag относится к конкретному ресурсу, поэтому кэш, сохранённый
+        для другого URL, не используется.
 
-    def _parse_json(self, data_text: str) -> list:
-        """Парсит JSON-текст и проверяет, что это массив."""
+        Кэш - только оптимизация: повреждённый файл или файл, ссылающийся
+        на что-либо, кроме OkvedItem, игнорируется, и данные загружаются
+        заново. Посторонние вызываемые объекты при этом не выполняются.
+        """
+        try:
+            with (self._cache_dir / "okved.pickle").open("rb") as file:
+                cached = _CacheUnpickler(file).load()
+        except Exception:
+            return None
+
+        if (
+            not isinstance(cached, tuple)
+            or len(cached) != 4
+            or cached[0] != _CACHE_FORMAT
+            or cached[1] != self._url
+            or not isinstance(cached[2], str)
+            or not isinstance(cached[3], list)
+            or not cached[3]
+            or not all(isinstance(item, OkvedItem) for item in cached[3])
+        ):
+            return None
+
+        _cache_format, _url, etag, items = cached
+        return etag, items
+
+    def _write_disk_cache(self, etag: str, items: list[OkvedItem]) -> None:
+        """Сохраняет записи ОКВЭД и ETag; ошибки записи не критичны."""
+        cache_path = self._cache_dir / "okved.pickle"
+        tmp_path = cache_path.with_suffix(".tmp")
         try:
-            data = json.loads(data_text)
-        except json.JSONDecodeError as exc:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            with tmp_path.open("wb") as file:
+                pickle.dump(
+                    (_CACHE_FORMAT, self._url, etag, items),
+                    file,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            tmp_path.replace(cache_path)
+        except OSError:
+            pass
+
+    def _parse_json(self, data_bytes: bytes | bytearray) -> list:
+        """Парсит JSON и проверяет, что это массив."""
+        try:
+            data = _json_loads(data_bytes)
+        except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+            # orjson.JSONDecodeError наследуется от json.JSONDecodeError.
             raise OkvedLoadError("Некорректный JSON в okved.json") from exc
 
         if not isinstance(data, list):
@@ -149,8 +309,14 @@ class OkvedRepository:
         return data
 
     def _extract_okved_items(self, data: list) -> list[OkvedItem]:
-        """Извлекает корректные записи ОКВЭД из массива данных."""
+        """Извлекает корректные записи ОКВЭД из массива данных.
+
+        Записи без цифр в коде пропускаются, так как их нельзя сопоставить
+        с номером. Из записей с одинаковыми по цифрам кодами остаётся первая:
+        сопоставитель и так выбирает её.
+        """
         items: list[OkvedItem] = []
+        seen_codes: set[str] = set()
 
         for entry in data:
             if not isinstance(entry, dict):
@@ -158,8 +324,12 @@ class OkvedRepository:
 
             code = str(entry.get("code", "")).strip()
             name = str(entry.get("name", "")).strip()
-            if code and name:
-                items.append(OkvedItem(code=code, name=name))
+            code_digits = _digits_only(code)
+            if not code_digits or not name or code_digits in seen_codes:
+                continue
+
+            seen_codes.add(code_digits)
+            items.append(OkvedItem(code=code, name=name))
 
         if not items:
             raise OkvedLoadError("Не найдено ни одной корректной записи ОКВЭД")
@@ -167,92 +337,95 @@ class OkvedRepository:
         return items
 
 
-@dataclass
-class _Candidate:
-    item: OkvedItem
-    match_length: int
-    full_match: bool
-
-
 class OkvedMatcher:
     """Находит лучший ОКВЭД для номера телефона."""
 
     def __init__(self, items: Iterable[OkvedItem]) -> None:
-        self._items: list[OkvedItem] = list(items)
+        okved_items = list(items)
 
-        if not self._items:
+        if not okved_items:
             raise ValueError("Список ОКВЭД не может быть пустым")
 
-        for idx, item in enumerate(self._items):
-            if not isinstance(item, OkvedItem):
-                raise TypeError(
-                    f"Элемент #{idx} не является OkvedItem: {type(item).__name__}",
-                )
+        if __debug__:
+            for idx, item in enumerate(okved_items):
+                if not isinstance(item, OkvedItem):
+                    raise TypeError(
+                        f"Элемент #{idx} не является OkvedItem: {type(item).__name__}",
+                    )
+
+        # Коды и названия хранятся параллельными списками: индекс ссылается
+        # на позицию записи, а название читается только для найденной.
+        self._codes: list[str] = [item.code for item in okved_items]
+        self._names: list[str] = [item.name for item in okved_items]
+        self._code_digits: list[str] = [
+            self._normalize_code(code) for code in self._codes
+        ]
+
+        self._by_suffix: dict[str, int] = {}
+        self._max_code_len = 0
+        for idx in range(len(self._codes)):
+            self._index_code(idx)
 
     def match(self, normalized_phone: str) -> MatchResult:
         """Находит лучший код ОКВЭД для номера."""
         digits = normalized_phone.lstrip("+")
-        candidates = self._collect_candidates(digits)
-        if candidates:
-            best = self._choose_best(candidates)
+        best = self._find_longest_suffix(digits)
+        if best is not None:
+            match_length, idx = best
             return MatchResult(
                 normalized_phone=normalized_phone,
-                okved_code=best.item.code,
-                okved_name=best.item.name,
-                match_length=best.match_length,
-                fallback_used=not bool(best.match_length),
+                okved_code=self._codes[idx],
+                okved_name=self._names[idx],
+                match_length=match_length,
+                fallback_used=False,
             )
 
-        phone_hash = hash(digits) % len(self._items)
-        fallback_item = self._items[phone_hash]
+        phone_hash = hash(digits) % len(self._codes)
         return MatchResult(
             normalized_phone=normalized_phone,
-            okved_code=fallback_item.code,
-            okved_name=fallback_item.name,
+            okved_code=self._codes[phone_hash],
+            okved_name=self._names[phone_hash],
             match_length=0,
             fallback_used=True,
         )
 
-    def _collect_candidates(self, phone_digits: str) -> list[_Candidate]:
-        """Собирает кандидатов на совпадение."""
-        candidates: list[_Candidate] = []
-        for item in self._items:
-            code_digits = self._normalize_code(item.code)
-            if not code_digits:
+    def _index_code(self, idx: int) -> None:
+        """Добавляет все суффиксы кода ОКВЭД в индекс.
+
+        Для каждого суффикса хранится первый код, совпадающий с ним целиком,
+        а если такого нет - первый код, который этим суффиксом оканчивается.
+        """
+        code_digits = self._code_digits[idx]
+        self._max_code_len = max(self._max_code_len, len(code_digits))
+
+        # Суффиксы перебираются от длинных к коротким: если суффикс уже есть
+        # в индексе, то вместе с ним ранее были добавлены и все более короткие,
+        # и дальше их можно не проверять.
+        for length in range(len(code_digits), 0, -1):
+            suffix = code_digits[-length:]
+            existing = self._by_suffix.get(suffix)
+            if existing is None:
+                self._by_suffix[suffix] = idx
                 continue
 
-            match_length = self._suffix_length(phone_digits, code_digits)
-            if match_length <= 0:
-                continue
-
-            full_match = match_length == len(code_digits)
-            candidates.append(
-                _Candidate(
-                    item=item,
-                    match_length=match_length,
-                    full_match=full_match,
-                ),
-            )
-        return candidates
+            full_match = length == len(code_digits)
+            if full_match and len(self._code_digits[existing]) != length:
+                self._by_suffix[suffix] = idx
+            break
+
+    def _find_longest_suffix(self, phone_digits: str) -> tuple[int, int] | None:
+        """Ищет длину совпадения и позицию лучшего кода для номера."""
+        max_len = min(len(phone_digits), self._max_code_len)
+        for length in range(max_len, 0, -1):
+            idx = self._by_suffix.get(phone_digits[-length:])
+            if idx is not None:
+                return length, idx
+        return None
 
     @staticmethod
     def _normalize_code(code: str) -> str:
         """Оставляет только цифры из кода ОКВЭД."""
-        return "".join(ch for ch in code if ch.isdigit())
-
-    @staticmethod
-    def _suffix_length(phone_digits: str, code_digits: str) -> int:
-        """Возвращает длину общего суффикса номера и кода ОКВЭД."""
-        i = 1
-        max_len = min(len(phone_digits), len(code_digits))
-        while i <= max_len and phone_digits[-i] == code_digits[-i]:
-            i += 1
-        return i - 1
-
-    @staticmethod
-    def _choose_best(candidates: list[_Candidate]) -> _Candidate:
-        """Выбирает кандидата с максимальной длиной совпадения."""
-        return max(candidates, key=lambda c: (c.match_length, c.full_match))
+        return _digits_only(code)
 
 
 class OkvedPhoneGame:
@@ -294,7 +467,7 @@ class OkvedPhoneGame:
                 match=None,
             )
 
-        matcher = OkvedMatcher(okved_items)
+        matcher = self._repository.get_matcher()
         match = matcher.match(normalized_phone)
 
         return GameResult(error=None, match=match)
@@ -3,7 +3,7 @@
 from dataclasses import dataclass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ErrorInfo:
     """Описание ошибки."""
 
@@ -11,7 +11,7 @@ class ErrorInfo:
     message: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class OkvedItem:
     """Запись ОКВЭД."""
 
@@ -19,7 +19,7 @@ class OkvedItem:
     name: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MatchResult:
     """Результат сопоставления номера и ОКВЭД."""
 
@@ -30,7 +30,7 @@ class MatchResult:
     fallback_used: bool
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class GameResult:
     """Результат выполнения игры."""
 
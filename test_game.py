@@ -0,0 +1,224 @@
+"""Тесты загрузки okved.json и дискового кэша в OkvedRepository."""
+
+from __future__ import annotations
+
+import gzip
+import json
+import pickle
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+from game import _CACHE_FORMAT, OkvedRepository
+from models import OkvedItem, OkvedLoadError
+
+
+def _start_server(
+    test: unittest.TestCase,
+    handler: type[BaseHTTPRequestHandler],
+) -> HTTPServer:
+    """Запускает HTTP-сервер в фоновом потоке до конца теста."""
+    server = HTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    test.addCleanup(server.server_close)
+    test.addCleanup(server.shutdown)
+    return server
+
+
+def _garbled_gzip() -> bytes:
+    """Возвращает gzip-тело с испорченным deflate-блоком."""
+    data = bytearray(gzip.compress(b'[{"code": "62.01", "name": "name"}]'))
+    # Сразу после 10-байтового заголовка gzip идёт первый deflate-блок;
+    # биты 0b11 в его заголовке означают недопустимый тип блока.
+    data[10] |= 0b110
+    return bytes(data)
+
+
+_foreign_calls: list[str] = []
+
+
+def _record_call(value: str) -> str:
+    """Запоминает вызов: сигнализирует, что при распаковке выполнился код."""
+    _foreign_calls.append(value)
+    return value
+
+
+class _ForeignGlobal:
+    """При распаковке pickle вызывает _record_call вместо себя."""
+
+    def __reduce__(self) -> tuple[object, tuple[str]]:
+        return _record_call, ("called",)
+
+
+class _GzipHandler(BaseHTTPRequestHandler):
+    """Отдаёт тело, объявленное как gzip, из атрибута сервера."""
+
+    def do_GET(self) -> None:
+        body: bytes = self.server.body  # type: ignore[attr-defined]
+        self.send_response(200)
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        """Отключает вывод журнала запросов."""
+
+
+class OkvedRepositoryGzipTest(unittest.TestCase):
+    """Проверяет обработку испорченных gzip-ответов."""
+
+    def _load(self, body: bytes) -> None:
+        server = _start_server(self, _GzipHandler)
+        server.body = body  # type: ignore[attr-defined]
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            url = f"http://127.0.0.1:{server.server_port}/okved.json"
+            OkvedRepository(url, cache_dir=Path(cache_dir)).get_all()
+
+    def test_garbled_gzip_raises_load_error(self) -> None:
+        with self.assertRaises(OkvedLoadError):
+            self._load(_garbled_gzip())
+
+    def test_truncated_gzip_raises_load_error(self) -> None:
+        body = gzip.compress(b'[{"code": "62.01", "name": "name"}]')
+        with self.assertRaises(OkvedLoadError):
+            self._load(body[: len(body) // 2])
+
+
+class _ConditionalHandler(BaseHTTPRequestHandler):
+    """Отдаёт okved.json с ETag и отвечает 304, если ETag совпал."""
+
+    def do_GET(self) -> None:
+        server = self.server
+        etag: str | None = server.etag  # type: ignore[attr-defined]
+        server.requests.append(self.headers)  # type: ignore[attr-defined]
+
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        body = json.dumps(server.data).encode()  # type: ignore[attr-defined]
+        self.send_response(200)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        """Отключает вывод журнала запросов."""
+
+
+class OkvedRepositoryConditionalGetTest(unittest.TestCase):
+    """Проверяет повторную загрузку okved.json через If-None-Match."""
+
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = Path(tmp.name)
+
+        self.server = _start_server(self, _ConditionalHandler)
+        self.server.data = [{"code": "62.01", "name": "name"}]  # type: ignore[attr-defined]
+        self.server.requests = []  # type: ignore[attr-defined]
+        self.url = f"http://127.0.0.1:{self.server.server_port}/okved.json"
+
+    def _get_all(self, url: str | None = None) -> list[OkvedItem]:
+        url = url if url is not None else self.url
+        return OkvedRepository(url, cache_dir=self.cache_dir).get_all()
+
+    def test_not_modified_returns_cached_items(self) -> None:
+        self.server.etag = '"v1"'  # type: ignore[attr-defined]
+        expected = [OkvedItem(code="62.01", name="name")]
+        self.assertEqual(self._get_all(), expected)
+
+        # При ответе 304 тело не передаётся, так что записи могут прийти
+        # только из кэша, а не из изменившихся данных сервера.
+        self.server.data = [{"code": "01.1", "name": "other"}]  # type: ignore[attr-defined]
+        self.assertEqual(self._get_all(), expected)
+
+        requests = self.server.requests  # type: ignore[attr-defined]
+        self.assertEqual(len(requests), 2)
+        self.assertNotIn("If-None-Match", requests[0])
+        self.assertEqual(requests[1].get("If-None-Match"), '"v1"')
+
+    def test_response_without_etag_is_not_cached(self) -> None:
+        self.server.etag = None  # type: ignore[attr-defined]
+        self.assertEqual(self._get_all(), [OkvedItem(code="62.01", name="name")])
+        self.assertFalse((self.cache_dir / "okved.pickle").exists())
+
+        self.server.data = [{"code": "01.1", "name": "other"}]  # type: ignore[attr-defined]
+        self.assertEqual(self._get_all(), [OkvedItem(code="01.1", name="other")])
+
+        requests = self.server.requests  # type: ignore[attr-defined]
+        self.assertNotIn("If-None-Match", requests[1])
+
+
+    def test_cache_is_not_shared_between_urls(self) -> None:
+        # Разные ресурсы могут отдавать одинаковый ETag.
+        self.server.etag = '"v1"'  # type: ignore[attr-defined]
+        self._get_all()
+
+        self.server.data = [{"code": "01.1", "name": "other"}]  # type: ignore[attr-defined]
+        other_url = f"http://127.0.0.1:{self.server.server_port}/other.json"
+        self.assertEqual(self._get_all(other_url), [OkvedItem(code="01.1", name="other")])
+
+        requests = self.server.requests  # type: ignore[attr-defined]
+        self.assertNotIn("If-None-Match", requests[1])
+
+
+class OkvedRepositoryDiskCacheTest(unittest.TestCase):
+    """Проверяет, что повреждённый кэш игнорируется."""
+
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = Path(tmp.name)
+        self.url = "http://127.0.0.1:1/okved.json"
+        self.repository = OkvedRepository(self.url, cache_dir=self.cache_dir)
+
+    def _write(self, data: bytes) -> None:
+        (self.cache_dir / "okved.pickle").write_bytes(data)
+
+    def test_valid_cache_is_read(self) -> None:
+        items = [OkvedItem(code="62.01", name="name")]
+        self._write(pickle.dumps((_CACHE_FORMAT, self.url, '"v1"', items)))
+        self.assertEqual(self.repository._read_disk_cache(), ('"v1"', items))
+
+    def test_cache_for_other_url_is_ignored(self) -> None:
+        items = [OkvedItem(code="62.01", name="name")]
+        other_url = "http://127.0.0.1:1/other.json"
+        self._write(pickle.dumps((_CACHE_FORMAT, other_url, '"v1"', items)))
+        self.assertIsNone(self.repository._read_disk_cache())
+
+    def test_damaged_cache_is_ignored(self) -> None:
+        items = [OkvedItem("62.01", "name")]
+        data = pickle.dumps((_CACHE_FORMAT, self.url, '"v1"', items))
+        damaged = [
+            data[: len(data) // 2],
+            b"\x80\xff" + data[2:],
+            data[:2] + b"\x95\xff\xff\xff\xff\xff\xff\xff\x7f" + data[11:],
+            b"garbage",
+        ]
+        for blob in damaged:
+            with self.subTest(blob=blob[:12]):
+                self._write(blob)
+                self.assertIsNone(self.repository._read_disk_cache())
+
+    def test_cache_with_foreign_items_is_ignored(self) -> None:
+        self._write(pickle.dumps((_CACHE_FORMAT, self.url, '"v1"', [("62.01", "name")])))
+        self.assertIsNone(self.repository._read_disk_cache())
+
+    def test_cache_with_foreign_global_is_not_executed(self) -> None:
+        self._write(pickle.dumps((_CACHE_FORMAT, self.url, '"v1"', [_ForeignGlobal()])))
+        self.assertIsNone(self.repository._read_disk_cache())
+        self.assertEqual(_foreign_calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()